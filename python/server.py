@@ -1,13 +1,27 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import whisper
-import tempfile
+from fastapi.responses import ORJSONResponse
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio, get_suppressed_tokens
+import ctranslate2
+import numpy as np
+import xxhash
+import webrtcvad
+import io
 import os
-import shutil
-from pathlib import Path
 import logging
 from dotenv import load_dotenv
 import asyncio
+from contextlib import asynccontextmanager
+import time
+from collections import OrderedDict
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No flock on Windows; workers there use WORKER_INDEX or GPU 0
 
 # Load environment variables
 load_dotenv()
@@ -16,7 +30,7 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="STT Dual Engine Server", description="Local Whisper + OpenAI Whisper")
+app = FastAPI(title="STT Dual Engine Server", description="Local Whisper + OpenAI Whisper", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -31,17 +45,90 @@ app.add_middleware(
 whisper_model = None
 openai_client = None
 MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")
+WHISPER_COMPUTE = os.getenv("WHISPER_COMPUTE")  # Defaults to the model size's MODEL_PROFILES entry (int8 on CPU)
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "2"))
+WORKERS = int(os.getenv("WORKERS", "0"))  # uvicorn processes, one model replica each; 0 = one per GPU, else per core
+WORKER_INDEX = os.getenv("WORKER_INDEX")  # Optional explicit GPU slot for external launchers
+worker_slot_file = None  # Lock file held while this process owns its worker slot
+
+# Request language codes mapped to Whisper language codes
+LANG_MAP = {"en-IN": "en", "hi-IN": "hi", "gu-IN": "gu"}
+ENGINES_LOCAL = frozenset({"both", "local"})
+ENGINES_OPENAI = frozenset({"both", "openai"})
+
+# Dynamic batching: requests are grouped by duration and encoded together
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE  # Whisper's fixed 30s encoder window
+MAX_BATCH = int(os.getenv("MAX_BATCH", "0"))  # 0 = use the model size's serving profile
+MAX_WAIT_MS = int(os.getenv("MAX_WAIT_MS", "50"))
+PENDING = {"short": [], "mid": []}  # bucket -> [(audio, language, future, enqueued_at)]
+batch_ready = asyncio.Event()
+batch_task = None
+batch_runs = set()  # In-flight batches, referenced so they aren't garbage collected
+TRANSCRIBE = None  # Local transcription coroutine bound at startup from MODEL_PROFILES
+
+# faster-whisper's quality thresholds, applied to batched output as well
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+# Voice activity detection trims silence before audio reaches Whisper
+VAD_MODE = int(os.getenv("VAD_MODE", "2"))  # webrtcvad aggressiveness, 0-3
+VAD_FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000  # webrtcvad accepts 10/20/30ms frames
+VAD_PADDING_FRAMES = 10  # Keep 300ms around speech so word onsets aren't clipped
+
+# LRU cache of transcriptions keyed by a hash of the decoded audio
+TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "1024"))
+transcript_cache = OrderedDict()
+
+# Reusable upload buffers so each request doesn't allocate its own staging memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_MB", "4")) * 1024 * 1024  # Larger uploads get a one-off buffer
+BUFFER_POOL_SIZE = int(os.getenv("BUFFER_POOL_SIZE", "0"))  # 0 = match the inference concurrency
+buffer_pool = asyncio.Queue()  # Filled at startup so only serving processes hold the buffers
+
+# Bounded concurrency: excess requests queue, and are shed with 503 after QUEUE_TIMEOUT
+MAX_CONCURRENT_INFER = int(os.getenv("MAX_CONCURRENT_INFER", "0"))  # 0 = derive from the serving profile
+MAX_CONCURRENT_OPENAI = int(os.getenv("MAX_CONCURRENT_OPENAI", "32"))
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "30"))
+RETRY_AFTER = os.getenv("RETRY_AFTER", "5")
+infer_semaphore = None  # Sized at startup once the serving profile is known
+openai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_OPENAI)
 
 @app.on_event("startup")
 async def startup_event():
     """Load Whisper model and initialize OpenAI"""
-    global whisper_model, openai_client
+    global whisper_model, openai_client, TRANSCRIBE, MAX_BATCH, infer_semaphore
     
     # Load local Whisper
     try:
         logger.info(f"Loading Whisper model: {MODEL_SIZE}")
-        whisper_model = whisper.load_model(MODEL_SIZE)
+        preferred_device, preferred_compute, profile_batch, profile_concurrency, make_transcriber = MODEL_PROFILES.get(
+            MODEL_SIZE.split(".")[0], LARGE_MODEL_PROFILE
+        )
+        device = resolve_device(preferred_device)
+        compute_type = resolve_compute_type(device, preferred_compute)
+        logger.info(f"Using device={device} compute_type={compute_type}")
+        whisper_model = WhisperModel(
+            MODEL_SIZE,
+            device=device,
+            device_index=worker_device_index(device),
+            compute_type=compute_type,
+            cpu_threads=worker_cpu_threads(device),
+            num_workers=WHISPER_WORKERS
+        )
+        await asyncio.to_thread(warm_up_model, whisper_model)
         logger.info("Whisper model loaded successfully!")
+        
+        # Bind the hot path once so requests never re-decide how to transcribe
+        MAX_BATCH = MAX_BATCH or profile_batch
+        TRANSCRIBE = make_transcriber()
+        concurrency = MAX_CONCURRENT_INFER or profile_concurrency(MAX_BATCH)
+        infer_semaphore = asyncio.Semaphore(concurrency)
+        for _ in range(BUFFER_POOL_SIZE or concurrency):
+            buffer_pool.put_nowait(bytearray(UPLOAD_BUFFER_SIZE))
+        logger.info(f"Local transcription via {make_transcriber.__name__}, max_batch={MAX_BATCH}, concurrency={concurrency}")
     except Exception as e:
         logger.error(f"Failed to load Whisper model: {e}")
         whisper_model = None
@@ -50,10 +137,10 @@ async def startup_event():
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key and openai_api_key != "your_openai_api_key_here":
         try:
-            from openai import OpenAI
-            openai_client = OpenAI(api_key=openai_api_key)
+            from openai import AsyncOpenAI
+            openai_client = AsyncOpenAI(api_key=openai_api_key)
             # Test connection
-            models = openai_client.models.list()
+            models = await openai_client.models.list()
             logger.info("OpenAI client initialized successfully!")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI: {e}")
@@ -61,6 +148,303 @@ async def startup_event():
     else:
         logger.info("OpenAI API key not configured")
 
+def resolve_device(preferred: str):
+    """Resolve WHISPER_DEVICE=auto to the profile's device, falling back to cpu without a GPU"""
+    if WHISPER_DEVICE != "auto":
+        return WHISPER_DEVICE
+    if preferred == "cuda" and ctranslate2.get_cuda_device_count() > 0:
+        return "cuda"
+    return "cpu"
+
+def resolve_compute_type(device: str, preferred: str):
+    """Use the profile's reduced-precision weights unless WHISPER_COMPUTE overrides them"""
+    if WHISPER_COMPUTE:
+        return WHISPER_COMPUTE
+    return "int8" if device == "cpu" else preferred
+
+def worker_count(device: str):
+    """Number of worker processes: WORKERS if set, else one per GPU on cuda and one per core on cpu"""
+    if WORKERS:
+        return WORKERS
+    if device == "cuda":
+        return max(ctranslate2.get_cuda_device_count(), 1)
+    return os.cpu_count() or 2
+
+def worker_cpu_threads(device: str):
+    """Split the cores between workers and their CTranslate2 replicas so they don't oversubscribe"""
+    if device != "cpu" or not WORKERS:
+        # CTranslate2's default; without WORKERS (e.g. started by `uvicorn server:app`) the sibling count is unknown
+        return 0
+    return max(1, (os.cpu_count() or 1) // (WORKERS * WHISPER_WORKERS))
+
+def claim_worker_slot():
+    """Claim the lowest free worker slot on this host by holding an exclusive lock on its file"""
+    global worker_slot_file
+    slot = 0
+    while True:
+        path = os.path.join(tempfile.gettempdir(), f"{__name__}-worker-{slot}.lock")
+        lock_file = open(path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            slot += 1
+            continue
+        # Held for the life of the process; the kernel drops the lock when it exits, so a restarted worker reclaims it
+        worker_slot_file = lock_file
+        return slot
+
+def worker_device_index(device: str):
+    """Pick this worker's GPU from WORKER_INDEX, or from the host-wide worker slot it claims"""
+    if device != "cuda":
+        return 0
+    gpu_count = max(ctranslate2.get_cuda_device_count(), 1)
+    if WORKER_INDEX is not None:
+        return int(WORKER_INDEX) % gpu_count
+    if fcntl is None:
+        return 0
+    # uvicorn doesn't number its workers; slots 0..N-1 go round-robin over the GPUs
+    return claim_worker_slot() % gpu_count
+
+def warm_up_model(model):
+    """Run a short silent clip so the first request doesn't pay for CUDA/kernel initialization"""
+    segments, _ = model.transcribe(np.zeros(SAMPLE_RATE * 5, dtype=np.float32), beam_size=1)
+    list(segments)
+
+def run_whisper(audio, options: dict):
+    """Run faster-whisper and collect its lazily decoded segments into a single result"""
+    segments, info = whisper_model.transcribe(
+        audio,
+        language=options.get("language"),
+        beam_size=1,
+        vad_filter=True
+    )
+    # Segments are a generator; decoding happens while they are consumed
+    text = "".join(segment.text for segment in segments)
+    return {"text": text, "language": info.language}
+
+def trim_silence(audio: np.ndarray):
+    """Drop leading and trailing non-speech frames; returns None if the clip has no speech"""
+    vad = webrtcvad.Vad(VAD_MODE)
+    pcm = (audio * 32768).clip(-32768, 32767).astype(np.int16)  # webrtcvad only reads int16
+    frame_count = len(pcm) // VAD_FRAME_SAMPLES
+    
+    def is_speech(index):
+        frame = pcm[index * VAD_FRAME_SAMPLES:(index + 1) * VAD_FRAME_SAMPLES]
+        return vad.is_speech(frame.tobytes(), SAMPLE_RATE)
+    
+    first = next((i for i in range(frame_count) if is_speech(i)), None)
+    if first is None:
+        return None
+    last = next(i for i in reversed(range(frame_count)) if is_speech(i))
+    
+    start = max(first - VAD_PADDING_FRAMES, 0) * VAD_FRAME_SAMPLES
+    end = min(last + 1 + VAD_PADDING_FRAMES, frame_count) * VAD_FRAME_SAMPLES
+    return audio[start:end]
+
+def prepare_audio(data: memoryview):
+    """Decode an upload and trim its silence, returning float32 samples or None for silent clips"""
+    # A seekable source lets containers like MP4/M4A find their index, which a pipe can't
+    return trim_silence(decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE))
+
+def cache_key(audio: np.ndarray, language):
+    """Hash the full decoded PCM buffer (seeded with its length) plus the requested language"""
+    return xxhash.xxh3_128(audio, seed=len(audio)).digest() + (language or "").encode()
+
+def cache_get(key: bytes):
+    """Return a cached transcription and mark it as recently used"""
+    result = transcript_cache.get(key)
+    if result is not None:
+        transcript_cache.move_to_end(key)
+    return result
+
+def cache_put(key: bytes, result: dict):
+    """Store a transcription, evicting the least recently used entry when full"""
+    transcript_cache[key] = result
+    transcript_cache.move_to_end(key)
+    if len(transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+        transcript_cache.popitem(last=False)
+
+def duration_bucket(audio: np.ndarray):
+    """Pick a batching bucket so clips of similar length decode together"""
+    duration = len(audio) / SAMPLE_RATE
+    if duration < 10:
+        return "short"
+    if duration <= 30:
+        return "mid"
+    return "long"
+
+def transcribe_batch(audios: list, languages: list):
+    """Encode a batch of clips (each <=30s) in one pass and greedily decode them together"""
+    extractor = whisper_model.feature_extractor
+    features = []
+    for audio in audios:
+        # Pad the waveform so every clip yields a full 30s mel window
+        padded = np.pad(audio, (0, max(WINDOW_SAMPLES - len(audio), 0)))
+        features.append(extractor(padded)[:, :extractor.nb_max_frames])
+    batch = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features)))
+    encoder_output = whisper_model.model.encode(batch, to_cpu=False)
+    
+    # Only run language detection if some request left it on auto
+    detected = [None] * len(audios)
+    if whisper_model.model.is_multilingual and any(language is None for language in languages):
+        detected = [
+            probs[0][0][2:-2]  # "<|en|>" -> "en"
+            for probs in whisper_model.model.detect_language(encoder_output)
+        ]
+    
+    tokenizers = []
+    for language, detected_language in zip(languages, detected):
+        tokenizers.append(Tokenizer(
+            whisper_model.hf_tokenizer,
+            whisper_model.model.is_multilingual,
+            task="transcribe",
+            language=language or detected_language or "en"
+        ))
+    prompts = [list(tokenizer.sot_sequence) + [tokenizer.no_timestamps] for tokenizer in tokenizers]
+    outputs = whisper_model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=1,
+        suppress_blank=True,
+        suppress_tokens=get_suppressed_tokens(tokenizers[0], [-1]),
+        return_scores=True,
+        return_no_speech_prob=True
+    )
+    
+    results = []
+    for audio, language, tokenizer, output in zip(audios, languages, tokenizers, outputs):
+        tokens = output.sequences_ids[0]
+        text = tokenizer.decode(tokens)
+        avg_logprob = output.scores[0] * len(tokens) / (len(tokens) + 1)
+        if output.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOG_PROB_THRESHOLD:
+            results.append({"text": "", "language": tokenizer.language_code})
+        elif avg_logprob < LOG_PROB_THRESHOLD or get_compression_ratio(text) > COMPRESSION_RATIO_THRESHOLD:
+            # Low-confidence or repetitive greedy output: redo it with temperature fallback
+            results.append(run_whisper(audio, {"language": language}))
+        else:
+            results.append({"text": text, "language": tokenizer.language_code})
+    return results
+
+async def run_batch(items: list):
+    """Run one batch off the event loop and resolve each request's future"""
+    audios = [audio for audio, _, _, _ in items]
+    languages = [language for _, language, _, _ in items]
+    try:
+        results = await asyncio.to_thread(transcribe_batch, audios, languages)
+    except Exception as e:
+        for _, _, future, _ in items:
+            if not future.done():
+                future.set_exception(e)
+        return
+    for (_, _, future, _), result in zip(items, results):
+        if not future.done():
+            future.set_result(result)
+
+async def batch_scheduler():
+    """Flush a bucket once it is full or its oldest request has waited MAX_WAIT_MS"""
+    while True:
+        if not any(PENDING.values()):
+            batch_ready.clear()
+            await batch_ready.wait()
+        now = time.monotonic()
+        for queue in PENDING.values():
+            if queue and (len(queue) >= MAX_BATCH or (now - queue[0][3]) * 1000 >= MAX_WAIT_MS):
+                items = queue[:MAX_BATCH]
+                del queue[:MAX_BATCH]
+                # Don't block the other bucket while this batch runs
+                task = asyncio.create_task(run_batch(items))
+                batch_runs.add(task)
+                task.add_done_callback(batch_runs.discard)
+        await asyncio.sleep(0.005)
+
+async def submit_for_batching(audio: np.ndarray, language):
+    """Queue decoded audio for the batch scheduler and wait for its transcription"""
+    bucket = duration_bucket(audio)
+    if bucket == "long":
+        # Clips beyond one window need faster-whisper's sliding-window transcription
+        return await asyncio.to_thread(run_whisper, audio, {"language": language})
+    if language is not None and language not in whisper_model.supported_languages:
+        # Reject here: an unknown code would fail Tokenizer() for everyone batched with this request
+        raise ValueError(f"'{language}' is not a valid language code")
+    future = asyncio.get_running_loop().create_future()
+    PENDING[bucket].append((audio, language, future, time.monotonic()))
+    batch_ready.set()
+    return await future
+
+def make_direct_transcriber():
+    """One faster-whisper call per request; batching wait outweighs its gain for small CPU models"""
+    async def transcribe(audio: np.ndarray, language):
+        return await asyncio.to_thread(run_whisper, audio, {"language": language})
+    return transcribe
+
+def make_batched_transcriber():
+    """Route requests through the duration-bucketed batch scheduler"""
+    global batch_task
+    batch_task = asyncio.create_task(batch_scheduler())
+    async def transcribe(audio: np.ndarray, language):
+        return await submit_for_batching(audio, language)
+    return transcribe
+
+def direct_concurrency(max_batch: int):
+    """One request in flight per CTranslate2 worker"""
+    return WHISPER_WORKERS
+
+def batched_concurrency(max_batch: int):
+    """Enough requests for one batch running plus one forming"""
+    return 2 * max_batch
+
+# Serving profile per model size: (preferred device, compute type, max batch, concurrency rule, transcriber factory)
+MODEL_PROFILES = {
+    "tiny": ("cpu", "int8", 1, direct_concurrency, make_direct_transcriber),
+    "base": ("cpu", "int8", 1, direct_concurrency, make_direct_transcriber),
+    "small": ("cuda", "float16", 8, batched_concurrency, make_batched_transcriber),
+    "medium": ("cuda", "float16", 8, batched_concurrency, make_batched_transcriber),
+}
+LARGE_MODEL_PROFILE = ("cuda", "int8_float16", 4, batched_concurrency, make_batched_transcriber)
+
+async def acquire_buffer():
+    """Take a pooled upload buffer, answering 503 if none frees up within QUEUE_TIMEOUT"""
+    try:
+        return await asyncio.wait_for(buffer_pool.get(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Upload buffers exhausted, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+
+async def read_upload(audio: UploadFile, buffer: bytearray):
+    """Read an upload into a pooled buffer and return a view of the filled bytes"""
+    view = memoryview(buffer)
+    size = 0
+    while chunk := await audio.read(UPLOAD_CHUNK_SIZE):
+        if size + len(chunk) > len(buffer):
+            # Too big for the pool: move what's staged into a one-off buffer and read the rest there
+            oversized = bytearray(view[:size])
+            oversized += chunk
+            oversized += await audio.read()
+            return memoryview(oversized)
+        view[size:size + len(chunk)] = chunk
+        size += len(chunk)
+    return view[:size]
+
+@asynccontextmanager
+async def inference_slot(semaphore: asyncio.Semaphore, engine_name: str):
+    """Hold a concurrency slot for one engine call, answering 503 if the queue wait times out"""
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{engine_name} is overloaded, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+    try:
+        yield
+    finally:
+        semaphore.release()
+
 @app.get("/health")
 async def health_check():
     """Health check with engine status"""
@@ -88,92 +472,136 @@ async def transcribe_audio(
     if not audio.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as temp_file:
+    logger.info(f"Transcribing {audio.filename} with engines: {engines}")
+    
+    # Prepare language options
+    options = {}
+    if language and language != "auto":
+        options["language"] = LANG_MAP.get(language, language)
+    
+    run_local = engines in ENGINES_LOCAL and whisper_model
+    run_openai = engines in ENGINES_OPENAI and openai_client
+    
+    audio_array = upload = decode_error = None
+    if run_local:
+        # Stage the upload in a pooled buffer for decoding; it goes back to the pool before inference starts
+        buffer = await acquire_buffer()
         try:
-            shutil.copyfileobj(audio.file, temp_file)
-            temp_path = temp_file.name
-            
-            logger.info(f"Transcribing {audio.filename} with engines: {engines}")
-            
-            # Prepare language options
-            options = {}
-            if language and language != "auto":
-                lang_map = {"en-IN": "en", "hi-IN": "hi", "gu-IN": "gu"}
-                options["language"] = lang_map.get(language, language)
-            
-            results = {}
-            
-            # Local Whisper transcription
-            if engines in ["both", "local"] and whisper_model:
-                try:
-                    logger.info("Running local Whisper transcription...")
-                    local_result = whisper_model.transcribe(temp_path, **options)
-                    results["local_whisper"] = {
-                        "text": local_result["text"].strip(),
-                        "language_detected": local_result.get("language", "unknown"),
-                        "confidence": "N/A",
-                        "engine": "local_whisper",
-                        "model_size": MODEL_SIZE,
-                        "status": "success"
-                    }
-                except Exception as e:
-                    logger.error(f"Local Whisper failed: {e}")
-                    results["local_whisper"] = {
-                        "text": f"Local Whisper failed: {str(e)}",
-                        "status": "error",
-                        "engine": "local_whisper"
-                    }
-            
-            # OpenAI Whisper transcription
-            if engines in ["both", "openai"] and openai_client:
-                try:
-                    logger.info("Running OpenAI Whisper transcription...")
-                    with open(temp_path, "rb") as audio_file:
-                        transcript = openai_client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            language=options.get("language") if options.get("language") else None
-                        )
-                    
-                    results["openai_whisper"] = {
-                        "text": transcript.text.strip(),
-                        "language_detected": options.get("language", "auto-detected"),
-                        "confidence": "N/A",
-                        "engine": "openai_whisper",
-                        "model": "whisper-1",
-                        "status": "success"
-                    }
-                except Exception as e:
-                    logger.error(f"OpenAI Whisper failed: {e}")
-                    results["openai_whisper"] = {
-                        "text": f"OpenAI Whisper failed: {str(e)}",
-                        "status": "error",
-                        "engine": "openai_whisper"
-                    }
-            elif engines in ["both", "openai"] and not openai_client:
-                results["openai_whisper"] = {
-                    "text": "OpenAI not configured - add API key to python/.env",
-                    "status": "not_configured",
-                    "engine": "openai_whisper"
-                }
-            
-            # If only one engine requested, return that format
-            if engines == "local" and "local_whisper" in results:
-                return results["local_whisper"]
-            elif engines == "openai" and "openai_whisper" in results:
-                return results["openai_whisper"]
-            
-            # Return dual results
-            return {
-                "engines": results,
-                "dual_mode": True,
-                "filename": audio.filename
-            }
-            
+            data = await read_upload(audio, buffer)
+            if run_openai:
+                upload = bytes(data)  # The OpenAI client needs its own bytes; copy once and let the buffer go
+            try:
+                audio_array = await asyncio.to_thread(prepare_audio, data)
+            except Exception as e:
+                decode_error = e
         finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            buffer_pool.put_nowait(buffer)
+    elif run_openai:
+        # OpenAI only needs bytes, so read Starlette's upload straight into them and skip the pool
+        upload = await audio.read()
+    
+    # Run the requested engines concurrently; latency is bounded by the slower one
+    tasks = {}
+    if run_local and decode_error is None:
+        logger.info("Running local Whisper transcription...")
+        tasks["local_whisper"] = transcribe_with_local_whisper(audio_array, options)
+    if run_openai:
+        logger.info("Running OpenAI Whisper transcription...")
+        tasks["openai_whisper"] = transcribe_with_openai(audio, upload, options)
+    
+    outcomes = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+    if decode_error is not None:
+        outcomes["local_whisper"] = decode_error
+    
+    shed = [outcome for outcome in outcomes.values() if isinstance(outcome, HTTPException)]
+    if shed and len(shed) == len(outcomes):
+        # Every engine was overloaded: let the client back off and retry
+        raise shed[0]
+    
+    results = {}
+    for engine_name, outcome in outcomes.items():
+        if isinstance(outcome, HTTPException):
+            # One engine was shed; still return the other engine's transcription
+            results[engine_name] = {
+                "text": outcome.detail,
+                "status": "overloaded",
+                "engine": engine_name
+            }
+        elif isinstance(outcome, Exception):
+            label = "Local Whisper" if engine_name == "local_whisper" else "OpenAI Whisper"
+            logger.error(f"{label} failed: {outcome}")
+            results[engine_name] = {
+                "text": f"{label} failed: {str(outcome)}",
+                "status": "error",
+                "engine": engine_name
+            }
+        else:
+            results[engine_name] = outcome
+    
+    if engines in ENGINES_OPENAI and not openai_client:
+        results["openai_whisper"] = {
+            "text": "OpenAI not configured - add API key to python/.env",
+            "status": "not_configured",
+            "engine": "openai_whisper"
+        }
+    
+    # If only one engine requested, return that format
+    if engines == "local" and "local_whisper" in results:
+        return results["local_whisper"]
+    elif engines == "openai" and "openai_whisper" in results:
+        return results["openai_whisper"]
+    
+    # Return dual results
+    return {
+        "engines": results,
+        "dual_mode": True,
+        "filename": audio.filename
+    }
+
+async def transcribe_with_local_whisper(audio: np.ndarray, options: dict):
+    """Transcribe decoded, silence-trimmed audio using the local Whisper model"""
+    if audio is None:
+        # Nothing but silence; skip the model entirely
+        return {
+            "text": "",
+            "language_detected": options.get("language", "unknown"),
+            "confidence": "N/A",
+            "engine": "local_whisper",
+            "model_size": MODEL_SIZE,
+            "status": "silence"
+        }
+    key = cache_key(audio, options.get("language"))
+    local_result = cache_get(key)
+    if local_result is None:
+        async with inference_slot(infer_semaphore, "Local Whisper"):
+            local_result = await TRANSCRIBE(audio, options.get("language"))
+        cache_put(key, local_result)
+    return {
+        "text": local_result["text"].strip(),
+        "language_detected": local_result.get("language", "unknown"),
+        "confidence": "N/A",
+        "engine": "local_whisper",
+        "model_size": MODEL_SIZE,
+        "status": "success"
+    }
+
+async def transcribe_with_openai(audio: UploadFile, upload: bytes, options: dict):
+    """Transcribe using the OpenAI Whisper API"""
+    async with inference_slot(openai_semaphore, "OpenAI Whisper"):
+        transcript = await openai_client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(audio.filename, upload, audio.content_type),
+            language=options.get("language") if options.get("language") else None
+        )
+    
+    return {
+        "text": transcript.text.strip(),
+        "language_detected": options.get("language", "auto-detected"),
+        "confidence": "N/A",
+        "engine": "openai_whisper",
+        "model": "whisper-1",
+        "status": "success"
+    }
 
 @app.get("/")
 async def root():
@@ -191,4 +619,8 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8082)
+    # Import string form is required for uvicorn to spawn multiple workers
+    preferred_device = MODEL_PROFILES.get(MODEL_SIZE.split(".")[0], LARGE_MODEL_PROFILE)[0]
+    workers = worker_count(resolve_device(preferred_device))
+    os.environ["WORKERS"] = str(workers)  # Workers inherit it, so each knows how many siblings share the cores
+    uvicorn.run("server:app", host="0.0.0.0", port=8082, workers=workers)
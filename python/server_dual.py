@@ -1,14 +1,35 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import whisper
+from fastapi.responses import ORJSONResponse
+from faster_whisper import WhisperModel
+import ctranslate2
+import numpy as np
 import tempfile
 import os
-import shutil
-from pathlib import Path
+import aiofiles
 import logging
 from dotenv import load_dotenv
-import openai
-from openai import OpenAI
+import asyncio
+from contextlib import asynccontextmanager
+import platform
+import queue
+import threading
+from openai import AsyncOpenAI
+
+try:
+    from liburing import (
+        io_uring, io_uring_cqe, io_uring_queue_init, io_uring_queue_exit,
+        io_uring_get_sqe, io_uring_prep_write, io_uring_prep_write_fixed,
+        io_uring_submit, io_uring_wait_cqe, io_uring_cqe_seen,
+        io_uring_register_buffers, io_uring_unregister_buffers, iovec
+    )
+except ImportError:
+    io_uring = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No flock on Windows; workers there use WORKER_INDEX or GPU 0
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +38,7 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="STT Dual Engine Server", description="Speech-to-Text with Local Whisper + OpenAI")
+app = FastAPI(title="STT Dual Engine Server", description="Speech-to-Text with Local Whisper + OpenAI", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -32,19 +53,65 @@ app.add_middleware(
 local_whisper_model = None
 openai_client = None
 MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+SAMPLE_RATE = 16000
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")
+WHISPER_COMPUTE = os.getenv("WHISPER_COMPUTE")  # Defaults to int8_float16 on GPU, int8 on CPU
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "2"))
+WORKERS = int(os.getenv("WORKERS", "0"))  # uvicorn processes, one model replica each; 0 = one per GPU, else per core
+WORKER_INDEX = os.getenv("WORKER_INDEX")  # Optional explicit GPU slot for external launchers
+worker_slot_file = None  # Lock file held while this process owns its worker slot
+
+# Request language codes mapped to Whisper language codes
+LANG_MAP = {"en-IN": "en", "hi-IN": "hi", "gu-IN": "gu"}
 PRIMARY_ENGINE = os.getenv("PRIMARY_ENGINE", "local_whisper")
 FALLBACK_ENGINE = os.getenv("FALLBACK_ENGINE", "openai_whisper")
 ENABLE_DUAL_ENGINE = os.getenv("ENABLE_DUAL_ENGINE", "true").lower() == "true"
 
+# Reusable upload buffers so each request doesn't allocate its own staging memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_MB", "4")) * 1024 * 1024  # Larger uploads get a one-off buffer
+BUFFER_POOL_SIZE = int(os.getenv("BUFFER_POOL_SIZE", "0"))  # 0 = match MAX_CONCURRENT_INFER
+upload_buffers = []  # Allocated at startup so only serving processes hold the buffers
+buffer_pool = asyncio.Queue()  # Holds indexes into upload_buffers (io_uring fixed-buffer slots)
+
+# Bounded concurrency: excess requests queue, and are shed with 503 after QUEUE_TIMEOUT
+MAX_CONCURRENT_INFER = int(os.getenv("MAX_CONCURRENT_INFER", "4"))
+MAX_CONCURRENT_OPENAI = int(os.getenv("MAX_CONCURRENT_OPENAI", "32"))
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "30"))
+RETRY_AFTER = os.getenv("RETRY_AFTER", "5")
+infer_semaphore = asyncio.Semaphore(MAX_CONCURRENT_INFER)
+openai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_OPENAI)
+
+# io_uring spool writer (Linux only); falls back to aiofiles when unavailable
+IO_URING_ENTRIES = 256
+IO_URING_MAX_BATCH = 16
+upload_writer = None
+
 @app.on_event("startup")
 async def startup_event():
     """Load models on startup"""
-    global local_whisper_model, openai_client
+    global local_whisper_model, openai_client, upload_writer
+    
+    # Allocate the upload pool before io_uring registers it
+    for index in range(BUFFER_POOL_SIZE or MAX_CONCURRENT_INFER):
+        upload_buffers.append(bytearray(UPLOAD_BUFFER_SIZE))
+        buffer_pool.put_nowait(index)
     
     # Load local Whisper model
     try:
         logger.info(f"Loading local Whisper model: {MODEL_SIZE}")
-        local_whisper_model = whisper.load_model(MODEL_SIZE)
+        device = resolve_device()
+        compute_type = resolve_compute_type(device)
+        logger.info(f"Using device={device} compute_type={compute_type}")
+        local_whisper_model = WhisperModel(
+            MODEL_SIZE,
+            device=device,
+            device_index=worker_device_index(device),
+            compute_type=compute_type,
+            cpu_threads=worker_cpu_threads(device),
+            num_workers=WHISPER_WORKERS
+        )
+        await asyncio.to_thread(warm_up_model, local_whisper_model)
         logger.info("Local Whisper model loaded successfully!")
     except Exception as e:
         logger.error(f"Failed to load local Whisper model: {e}")
@@ -54,9 +121,9 @@ async def startup_event():
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key and openai_api_key != "your_openai_api_key_here":
         try:
-            openai_client = OpenAI(api_key=openai_api_key)
+            openai_client = AsyncOpenAI(api_key=openai_api_key)
             # Test the connection
-            models = openai_client.models.list()
+            models = await openai_client.models.list()
             logger.info("OpenAI client initialized successfully!")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -64,6 +131,278 @@ async def startup_event():
     else:
         logger.warning("OpenAI API key not provided")
         openai_client = None
+    
+    # Set up the io_uring spool writer
+    if io_uring is not None and platform.system() == "Linux":
+        try:
+            upload_writer = IoUringWriter(upload_buffers)
+            logger.info("io_uring upload writer initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize io_uring, falling back to aiofiles: {e}")
+            upload_writer = None
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the io_uring ring"""
+    if upload_writer:
+        upload_writer.close()
+
+def resolve_device():
+    """Resolve WHISPER_DEVICE=auto to cuda when a GPU is visible"""
+    if WHISPER_DEVICE != "auto":
+        return WHISPER_DEVICE
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+def resolve_compute_type(device: str):
+    """Use reduced-precision weights for the device unless WHISPER_COMPUTE overrides them"""
+    if WHISPER_COMPUTE:
+        return WHISPER_COMPUTE
+    return "int8_float16" if device == "cuda" else "int8"
+
+def worker_count(device: str):
+    """Number of worker processes: WORKERS if set, else one per GPU on cuda and one per core on cpu"""
+    if WORKERS:
+        return WORKERS
+    if device == "cuda":
+        return max(ctranslate2.get_cuda_device_count(), 1)
+    return os.cpu_count() or 2
+
+def worker_cpu_threads(device: str):
+    """Split the cores between workers and their CTranslate2 replicas so they don't oversubscribe"""
+    if device != "cpu" or not WORKERS:
+        # CTranslate2's default; without WORKERS (e.g. started by `uvicorn server:app`) the sibling count is unknown
+        return 0
+    return max(1, (os.cpu_count() or 1) // (WORKERS * WHISPER_WORKERS))
+
+def claim_worker_slot():
+    """Claim the lowest free worker slot on this host by holding an exclusive lock on its file"""
+    global worker_slot_file
+    slot = 0
+    while True:
+        path = os.path.join(tempfile.gettempdir(), f"{__name__}-worker-{slot}.lock")
+        lock_file = open(path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            slot += 1
+            continue
+        # Held for the life of the process; the kernel drops the lock when it exits, so a restarted worker reclaims it
+        worker_slot_file = lock_file
+        return slot
+
+def worker_device_index(device: str):
+    """Pick this worker's GPU from WORKER_INDEX, or from the host-wide worker slot it claims"""
+    if device != "cuda":
+        return 0
+    gpu_count = max(ctranslate2.get_cuda_device_count(), 1)
+    if WORKER_INDEX is not None:
+        return int(WORKER_INDEX) % gpu_count
+    if fcntl is None:
+        return 0
+    # uvicorn doesn't number its workers; slots 0..N-1 go round-robin over the GPUs
+    return claim_worker_slot() % gpu_count
+
+def warm_up_model(model):
+    """Run a short silent clip so the first request doesn't pay for CUDA/kernel initialization"""
+    segments, _ = model.transcribe(np.zeros(SAMPLE_RATE * 5, dtype=np.float32), beam_size=1)
+    list(segments)
+
+def run_whisper(audio, options: dict):
+    """Run faster-whisper and collect its lazily decoded segments into a single result"""
+    segments, info = local_whisper_model.transcribe(
+        audio,
+        language=options.get("language"),
+        beam_size=1,
+        vad_filter=True
+    )
+    # Segments are a generator; decoding happens while they are consumed
+    text = "".join(segment.text for segment in segments)
+    return {"text": text, "language": info.language}
+
+async def acquire_buffer():
+    """Take a pooled upload buffer, answering 503 if none frees up within QUEUE_TIMEOUT"""
+    try:
+        return await asyncio.wait_for(buffer_pool.get(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Upload buffers exhausted, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+
+async def read_upload(audio: UploadFile, buffer: bytearray):
+    """Read an upload into a pooled buffer and return a view of the filled bytes"""
+    view = memoryview(buffer)
+    size = 0
+    while chunk := await audio.read(UPLOAD_CHUNK_SIZE):
+        if size + len(chunk) > len(buffer):
+            # Too big for the pool: move what's staged into a one-off buffer and read the rest there
+            oversized = bytearray(view[:size])
+            oversized += chunk
+            oversized += await audio.read()
+            return memoryview(oversized)
+        view[size:size + len(chunk)] = chunk
+        size += len(chunk)
+    return view[:size]
+
+def resolve_future(future: asyncio.Future, result=None, error=None):
+    """Complete a future from the event loop thread unless its request was cancelled"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+class IoUringWriter:
+    """Coalesces file writes from concurrent uploads into batched io_uring submissions"""
+    
+    def __init__(self, buffers: list, entries: int = IO_URING_ENTRIES, max_batch: int = IO_URING_MAX_BATCH):
+        self.max_batch = max_batch
+        self.ring = io_uring()
+        io_uring_queue_init(entries, self.ring, 0)
+        
+        # Register the upload pool with the kernel once so writes skip per-I/O page pinning
+        try:
+            io_uring_register_buffers(self.ring, iovec(buffers), len(buffers))
+            self.fixed_buffers = True
+        except Exception as e:
+            logger.warning(f"io_uring buffer registration failed, using plain writes: {e}")
+            self.fixed_buffers = False
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="io-uring-writer", daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        """Drain queued writes, submitting up to max_batch SQEs per io_uring_submit"""
+        global upload_writer
+        cqe = io_uring_cqe()
+        batch = []
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    break
+                batch = [request]
+                while len(batch) < self.max_batch:
+                    try:
+                        request = self.requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is None:
+                        self.requests.put(None)  # Finish this batch, then stop
+                        break
+                    batch.append(request)
+                self._submit(batch, cqe)
+                batch = []
+        except Exception as e:
+            # Hand spooling to aiofiles and fail everything this writer still owes an answer
+            logger.error(f"io_uring writer failed, falling back to aiofiles: {e}")
+            upload_writer = None
+            self._fail(batch, e)
+            try:
+                self._teardown()
+            except Exception as teardown_error:
+                logger.warning(f"io_uring teardown failed: {teardown_error}")
+            # Keep answering writes queued by requests that picked up this writer before the switch
+            while (request := self.requests.get()) is not None:
+                self._fail([request], e)
+            return
+        self._teardown()
+    
+    def _submit(self, batch: list, cqe):
+        """Submit one batch of writes and resolve each future from its completion"""
+        for index, (fd, buf, offset, buf_index, _, _) in enumerate(batch):
+            sqe = io_uring_get_sqe(self.ring)
+            if sqe is None:
+                raise OSError("io_uring submission queue is full")
+            if self.fixed_buffers and buf_index is not None:
+                io_uring_prep_write_fixed(sqe, fd, buf, len(buf), offset, buf_index)
+            else:
+                io_uring_prep_write(sqe, fd, buf, len(buf), offset)
+            sqe.user_data = index
+        submitted = io_uring_submit(self.ring)
+        if submitted < 0:
+            raise OSError(-submitted, os.strerror(-submitted))
+        if submitted != len(batch):
+            raise OSError(f"io_uring_submit queued {submitted} of {len(batch)} writes")
+        
+        for _ in batch:
+            io_uring_wait_cqe(self.ring, cqe)
+            index, res = cqe.user_data, cqe.res
+            io_uring_cqe_seen(self.ring, cqe)
+            _, _, _, _, loop, future = batch[index]
+            if res < 0:
+                loop.call_soon_threadsafe(resolve_future, future, None, OSError(-res, os.strerror(-res)))
+            else:
+                loop.call_soon_threadsafe(resolve_future, future, res)
+    
+    def _fail(self, requests: list, error: Exception):
+        """Fail the futures of writes that will never complete"""
+        for _, _, _, _, loop, future in requests:
+            loop.call_soon_threadsafe(resolve_future, future, None, error)
+    
+    def _teardown(self):
+        """Unregister the upload pool and release the ring"""
+        if self.fixed_buffers:
+            io_uring_unregister_buffers(self.ring)
+        io_uring_queue_exit(self.ring)
+    
+    async def write(self, fd: int, buf: memoryview, offset: int, buf_index: int = None):
+        """Queue a single write and return the number of bytes written"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests.put((fd, buf, offset, buf_index, loop, future))
+        return await future
+    
+    async def write_all(self, fd: int, data: memoryview, buf_index: int = None):
+        """Write a whole buffer as one SQE per chunk, then finish any short writes"""
+        offsets = range(0, len(data), UPLOAD_CHUNK_SIZE)
+        # Let every chunk settle before raising: the caller closes fd and recycles the buffer afterwards
+        written = await asyncio.gather(
+            *(self.write(fd, data[offset:offset + UPLOAD_CHUNK_SIZE], offset, buf_index) for offset in offsets),
+            return_exceptions=True
+        )
+        for count in written:
+            if isinstance(count, Exception):
+                raise count
+        for offset, count in zip(offsets, written):
+            position, end = offset + count, min(offset + UPLOAD_CHUNK_SIZE, len(data))
+            while position < end:
+                count = await self.write(fd, data[position:end], position, buf_index)
+                if count == 0:
+                    raise OSError("io_uring write made no progress")
+                position += count
+    
+    def close(self):
+        """Stop the writer thread and tear down the ring"""
+        self.requests.put(None)
+        self.thread.join()
+
+async def spool_upload(fd: int, data: memoryview, buffer_index: int):
+    """Write staged upload bytes to the spool file, via io_uring when available"""
+    if upload_writer:
+        await upload_writer.write_all(fd, data, buffer_index)
+    else:
+        async with aiofiles.open(fd, "wb", closefd=False) as temp_file:
+            await temp_file.write(data)
+
+@asynccontextmanager
+async def inference_slot(semaphore: asyncio.Semaphore, engine_name: str):
+    """Hold a concurrency slot for one engine call, answering 503 if the queue wait times out"""
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{engine_name} is overloaded, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+    try:
+        yield
+    finally:
+        semaphore.release()
 
 @app.get("/health")
 async def health_check():
@@ -111,64 +450,102 @@ async def transcribe_audio(
     else:
         selected_engine = f"{engine}_whisper"
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as temp_file:
+    # Stage the upload in a pooled buffer; only the local engine needs it spooled to disk
+    needs_spool = local_whisper_model is not None and (
+        selected_engine == "local_whisper"
+        or (ENABLE_DUAL_ENGINE and FALLBACK_ENGINE == "local_whisper")
+    )
+    needs_upload = openai_client is not None and (
+        selected_engine == "openai_whisper"
+        or (ENABLE_DUAL_ENGINE and FALLBACK_ENGINE == "openai_whisper")
+    )
+    temp_path = None
+    upload = None
+    try:
+        if needs_spool:
+            # The buffer goes back to the pool once the upload is spooled and copied, before inference
+            buffer_index = await acquire_buffer()
+            try:
+                data = await read_upload(audio, upload_buffers[buffer_index])
+                suffix = os.path.splitext(audio.filename)[1]
+                fd, temp_path = tempfile.mkstemp(suffix=suffix)
+                try:
+                    # Oversized uploads live outside the registered pool, so they can't use fixed writes
+                    pooled = data.obj is upload_buffers[buffer_index]
+                    await spool_upload(fd, data, buffer_index if pooled else None)
+                finally:
+                    os.close(fd)
+                if needs_upload:
+                    upload = bytes(data)  # The OpenAI client needs its own bytes
+            finally:
+                buffer_pool.put_nowait(buffer_index)
+        elif needs_upload:
+            # OpenAI only needs bytes, so read Starlette's upload straight into them and skip the pool
+            upload = await audio.read()
+        
+        logger.info(f"Transcribing {audio.filename} with {selected_engine}")
+        
+        # Try primary engine
         try:
-            shutil.copyfileobj(audio.file, temp_file)
-            temp_path = temp_file.name
+            if selected_engine == "local_whisper" and local_whisper_model:
+                result = await transcribe_with_local_whisper(temp_path, language)
+            elif selected_engine == "openai_whisper" and openai_client:
+                result = await transcribe_with_openai(audio, upload, language)
+            else:
+                raise Exception(f"Engine {selected_engine} not available")
             
-            logger.info(f"Transcribing {audio.filename} with {selected_engine}")
+            result["engine_used"] = selected_engine
+            return result
             
-            # Try primary engine
-            try:
-                if selected_engine == "local_whisper" and local_whisper_model:
-                    result = await transcribe_with_local_whisper(temp_path, language)
-                elif selected_engine == "openai_whisper" and openai_client:
-                    result = await transcribe_with_openai(temp_path, language)
-                else:
-                    raise Exception(f"Engine {selected_engine} not available")
-                
-                result["engine_used"] = selected_engine
-                return result
-                
-            except Exception as primary_error:
-                logger.error(f"Primary engine {selected_engine} failed: {primary_error}")
-                
-                # Try fallback engine if dual engine is enabled
-                if ENABLE_DUAL_ENGINE and FALLBACK_ENGINE:
-                    try:
-                        logger.info(f"Trying fallback engine: {FALLBACK_ENGINE}")
-                        
-                        if FALLBACK_ENGINE == "local_whisper" and local_whisper_model:
-                            result = await transcribe_with_local_whisper(temp_path, language)
-                        elif FALLBACK_ENGINE == "openai_whisper" and openai_client:
-                            result = await transcribe_with_openai(temp_path, language)
-                        else:
-                            raise Exception(f"Fallback engine {FALLBACK_ENGINE} not available")
-                        
-                        result["engine_used"] = f"{FALLBACK_ENGINE} (fallback)"
-                        result["primary_engine_error"] = str(primary_error)
-                        return result
-                        
-                    except Exception as fallback_error:
-                        logger.error(f"Fallback engine failed: {fallback_error}")
-                        raise HTTPException(status_code=500, detail=f"Both engines failed. Primary: {primary_error}, Fallback: {fallback_error}")
-                else:
-                    raise HTTPException(status_code=500, detail=f"Transcription failed: {primary_error}")
+        except Exception as primary_error:
+            logger.error(f"Primary engine {selected_engine} failed: {primary_error}")
             
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
+            # Try fallback engine if dual engine is enabled
+            if ENABLE_DUAL_ENGINE and FALLBACK_ENGINE:
+                try:
+                    logger.info(f"Trying fallback engine: {FALLBACK_ENGINE}")
+                    
+                    if FALLBACK_ENGINE == "local_whisper" and local_whisper_model:
+                        result = await transcribe_with_local_whisper(temp_path, language)
+                    elif FALLBACK_ENGINE == "openai_whisper" and openai_client:
+                        result = await transcribe_with_openai(audio, upload, language)
+                    else:
+                        raise Exception(f"Fallback engine {FALLBACK_ENGINE} not available")
+                    
+                    result["engine_used"] = f"{FALLBACK_ENGINE} (fallback)"
+                    result["primary_engine_error"] = str(primary_error)
+                    return result
+                    
+                except Exception as fallback_error:
+                    logger.error(f"Fallback engine failed: {fallback_error}")
+                    if isinstance(primary_error, HTTPException):
+                        # Primary was shed and the fallback couldn't take the request: keep its 503 and Retry-After
+                        raise primary_error
+                    if isinstance(fallback_error, HTTPException):
+                        raise
+                    raise HTTPException(status_code=500, detail=f"Both engines failed. Primary: {primary_error}, Fallback: {fallback_error}")
+            elif isinstance(primary_error, HTTPException):
+                raise
+            else:
+                raise HTTPException(status_code=500, detail=f"Transcription failed: {primary_error}")
+        
+    finally:
+        # Clean up temporary file
+        if temp_path:
+            try:
                 os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
 
 async def transcribe_with_local_whisper(temp_path: str, language: str):
     """Transcribe using local Whisper model"""
     options = {}
     if language and language != "auto":
-        lang_map = {"en-IN": "en", "hi-IN": "hi", "gu-IN": "gu"}
-        options["language"] = lang_map.get(language, language)
+        options["language"] = LANG_MAP.get(language, language)
     
-    result = local_whisper_model.transcribe(temp_path, **options)
+    # Run inference in a worker thread so the event loop keeps serving requests
+    async with inference_slot(infer_semaphore, "Local Whisper"):
+        result = await asyncio.to_thread(run_whisper, temp_path, options)
     
     return {
         "text": result["text"].strip(),
@@ -178,12 +555,12 @@ async def transcribe_with_local_whisper(temp_path: str, language: str):
         "model_size": MODEL_SIZE
     }
 
-async def transcribe_with_openai(temp_path: str, language: str):
-    """Transcribe using OpenAI Whisper API"""
-    with open(temp_path, "rb") as audio_file:
-        transcript = openai_client.audio.transcriptions.create(
+async def transcribe_with_openai(audio: UploadFile, upload: bytes, language: str):
+    """Transcribe using OpenAI Whisper API, sending the in-memory upload directly"""
+    async with inference_slot(openai_semaphore, "OpenAI Whisper"):
+        transcript = await openai_client.audio.transcriptions.create(
             model="whisper-1",
-            file=audio_file,
+            file=(audio.filename, upload, audio.content_type),
             language=language if language != "auto" else None
         )
     
@@ -230,4 +607,7 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8082)
+    # Import string form is required for uvicorn to spawn multiple workers
+    workers = worker_count(resolve_device())
+    os.environ["WORKERS"] = str(workers)  # Workers inherit it, so each knows how many siblings share the cores
+    uvicorn.run("server_dual:app", host="0.0.0.0", port=8082, workers=workers)
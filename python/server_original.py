@@ -1,17 +1,31 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-import whisper
-import tempfile
+from fastapi.responses import ORJSONResponse
+from faster_whisper import WhisperModel, decode_audio
+import ctranslate2
+import io
+import asyncio
 import os
-import shutil
-from pathlib import Path
+import queue
+import threading
+from anyio.to_thread import current_default_thread_limiter
+import numpy as np
+import xxhash
+import webrtcvad
+from collections import OrderedDict
 import logging
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No flock on Windows; workers there use WORKER_INDEX or GPU 0
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="STT Server", description="Speech-to-Text with Whisper")
+app = FastAPI(title="STT Server", description="Speech-to-Text with Whisper", default_response_class=ORJSONResponse)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -25,19 +39,218 @@ app.add_middleware(
 # Global variables
 whisper_model = None
 MODEL_SIZE = "base"  # Options: tiny, base, small, medium, large
+SAMPLE_RATE = 16000
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")
+WHISPER_COMPUTE = os.getenv("WHISPER_COMPUTE")  # Defaults to int8_float16 on GPU, int8 on CPU
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "2"))
+WORKERS = int(os.getenv("WORKERS", "0"))  # uvicorn processes, one model replica each; 0 = one per GPU, else per core
+WORKER_INDEX = os.getenv("WORKER_INDEX")  # Optional explicit GPU slot for external launchers
+worker_slot_file = None  # Lock file held while this process owns its worker slot
+
+# Request language codes mapped to Whisper language codes
+LANG_MAP = {"en-IN": "en", "hi-IN": "hi", "gu-IN": "gu"}
+
+# Voice activity detection trims silence before audio reaches Whisper
+VAD_MODE = int(os.getenv("VAD_MODE", "2"))  # webrtcvad aggressiveness, 0-3
+VAD_FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000  # webrtcvad accepts 10/20/30ms frames
+VAD_PADDING_FRAMES = 10  # Keep 300ms around speech so word onsets aren't clipped
+
+# LRU cache of transcriptions keyed by a hash of the decoded audio
+TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "1024"))
+transcript_cache = OrderedDict()
+cache_lock = threading.Lock()
+
+# Reusable upload buffers so each request doesn't allocate its own staging memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_MB", "4")) * 1024 * 1024  # Larger uploads get a one-off buffer
+BUFFER_POOL_SIZE = int(os.getenv("BUFFER_POOL_SIZE", "0"))  # 0 = match MAX_CONCURRENT_INFER
+buffer_pool = queue.Queue()  # Filled at startup so only serving processes hold the buffers
+
+# Bounded concurrency: excess requests queue on the event loop, and are shed with 503 after QUEUE_TIMEOUT
+MAX_CONCURRENT_INFER = int(os.getenv("MAX_CONCURRENT_INFER", "0")) or WHISPER_WORKERS  # 0 = one per CTranslate2 worker
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "30"))
+RETRY_AFTER = os.getenv("RETRY_AFTER", "5")
+infer_semaphore = asyncio.Semaphore(MAX_CONCURRENT_INFER)
+
+# /transcribe is a sync endpoint, so Starlette runs it in anyio's threadpool
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "0"))  # 0 = this worker's share of the cores (all of them if WORKERS is unset)
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "64"))
 
 @app.on_event("startup")
 async def startup_event():
     """Load Whisper model on startup"""
     global whisper_model
+    
+    # Size the threadpool that runs sync endpoints to this worker's share of the cores, keeping
+    # at least one token beyond the admitted requests for Starlette's upload file I/O
+    current_default_thread_limiter().total_tokens = THREADPOOL_SIZE or max(
+        MAX_CONCURRENT_INFER + 1, (os.cpu_count() or 4) // (WORKERS or 1)
+    )
+    for _ in range(BUFFER_POOL_SIZE or MAX_CONCURRENT_INFER):
+        buffer_pool.put_nowait(bytearray(UPLOAD_BUFFER_SIZE))
+    
     try:
         logger.info(f"Loading Whisper model: {MODEL_SIZE}")
-        whisper_model = whisper.load_model(MODEL_SIZE)
+        device = resolve_device()
+        compute_type = resolve_compute_type(device)
+        logger.info(f"Using device={device} compute_type={compute_type}")
+        whisper_model = WhisperModel(
+            MODEL_SIZE,
+            device=device,
+            device_index=worker_device_index(device),
+            compute_type=compute_type,
+            cpu_threads=worker_cpu_threads(device),
+            num_workers=WHISPER_WORKERS
+        )
+        warm_up_model(whisper_model)
         logger.info("Whisper model loaded successfully!")
     except Exception as e:
         logger.error(f"Failed to load Whisper model: {e}")
         whisper_model = None
 
+def resolve_device():
+    """Resolve WHISPER_DEVICE=auto to cuda when a GPU is visible"""
+    if WHISPER_DEVICE != "auto":
+        return WHISPER_DEVICE
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+def resolve_compute_type(device: str):
+    """Use reduced-precision weights for the device unless WHISPER_COMPUTE overrides them"""
+    if WHISPER_COMPUTE:
+        return WHISPER_COMPUTE
+    return "int8_float16" if device == "cuda" else "int8"
+
+def worker_count(device: str):
+    """Number of worker processes: WORKERS if set, else one per GPU on cuda and one per core on cpu"""
+    if WORKERS:
+        return WORKERS
+    if device == "cuda":
+        return max(ctranslate2.get_cuda_device_count(), 1)
+    return os.cpu_count() or 2
+
+def worker_cpu_threads(device: str):
+    """Split the cores between workers and their CTranslate2 replicas so they don't oversubscribe"""
+    if device != "cpu" or not WORKERS:
+        # CTranslate2's default; without WORKERS (e.g. started by `uvicorn server:app`) the sibling count is unknown
+        return 0
+    return max(1, (os.cpu_count() or 1) // (WORKERS * WHISPER_WORKERS))
+
+def claim_worker_slot():
+    """Claim the lowest free worker slot on this host by holding an exclusive lock on its file"""
+    global worker_slot_file
+    slot = 0
+    while True:
+        path = os.path.join(tempfile.gettempdir(), f"{__name__}-worker-{slot}.lock")
+        lock_file = open(path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            slot += 1
+            continue
+        # Held for the life of the process; the kernel drops the lock when it exits, so a restarted worker reclaims it
+        worker_slot_file = lock_file
+        return slot
+
+def worker_device_index(device: str):
+    """Pick this worker's GPU from WORKER_INDEX, or from the host-wide worker slot it claims"""
+    if device != "cuda":
+        return 0
+    gpu_count = max(ctranslate2.get_cuda_device_count(), 1)
+    if WORKER_INDEX is not None:
+        return int(WORKER_INDEX) % gpu_count
+    if fcntl is None:
+        return 0
+    # uvicorn doesn't number its workers; slots 0..N-1 go round-robin over the GPUs
+    return claim_worker_slot() % gpu_count
+
+def warm_up_model(model):
+    """Run a short silent clip so the first request doesn't pay for CUDA/kernel initialization"""
+    segments, _ = model.transcribe(np.zeros(SAMPLE_RATE * 5, dtype=np.float32), beam_size=1)
+    list(segments)
+
+def run_whisper(audio, options: dict):
+    """Run faster-whisper and collect its lazily decoded segments into a single result"""
+    segments, info = whisper_model.transcribe(
+        audio,
+        language=options.get("language"),
+        beam_size=1,
+        vad_filter=True
+    )
+    # Segments are a generator; decoding happens while they are consumed
+    text = "".join(segment.text for segment in segments)
+    return {"text": text, "language": info.language}
+
+def trim_silence(audio: np.ndarray):
+    """Drop leading and trailing non-speech frames; returns None if the clip has no speech"""
+    vad = webrtcvad.Vad(VAD_MODE)
+    pcm = (audio * 32768).clip(-32768, 32767).astype(np.int16)  # webrtcvad only reads int16
+    frame_count = len(pcm) // VAD_FRAME_SAMPLES
+    
+    def is_speech(index):
+        frame = pcm[index * VAD_FRAME_SAMPLES:(index + 1) * VAD_FRAME_SAMPLES]
+        return vad.is_speech(frame.tobytes(), SAMPLE_RATE)
+    
+    first = next((i for i in range(frame_count) if is_speech(i)), None)
+    if first is None:
+        return None
+    last = next(i for i in reversed(range(frame_count)) if is_speech(i))
+    
+    start = max(first - VAD_PADDING_FRAMES, 0) * VAD_FRAME_SAMPLES
+    end = min(last + 1 + VAD_PADDING_FRAMES, frame_count) * VAD_FRAME_SAMPLES
+    return audio[start:end]
+
+def prepare_audio(data: memoryview):
+    """Decode an upload and trim its silence, returning float32 samples or None for silent clips"""
+    # A seekable source lets containers like MP4/M4A find their index, which a pipe can't
+    return trim_silence(decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE))
+
+def cache_key(audio: np.ndarray, language):
+    """Hash the full decoded PCM buffer (seeded with its length) plus the requested language"""
+    return xxhash.xxh3_128(audio, seed=len(audio)).digest() + (language or "").encode()
+
+def cache_get(key: bytes):
+    """Return a cached transcription and mark it as recently used"""
+    with cache_lock:
+        result = transcript_cache.get(key)
+        if result is not None:
+            transcript_cache.move_to_end(key)
+        return result
+
+def cache_put(key: bytes, result: dict):
+    """Store a transcription, evicting the least recently used entry when full"""
+    with cache_lock:
+        transcript_cache[key] = result
+        transcript_cache.move_to_end(key)
+        if len(transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+            transcript_cache.popitem(last=False)
+
+def acquire_buffer():
+    """Take a pooled upload buffer, answering 503 if none frees up within QUEUE_TIMEOUT"""
+    try:
+        return buffer_pool.get(timeout=QUEUE_TIMEOUT)
+    except queue.Empty:
+        raise HTTPException(
+            status_code=503,
+            detail="Upload buffers exhausted, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+
+def read_upload(audio: UploadFile, buffer: bytearray):
+    """Read an upload into a pooled buffer and return a view of the filled bytes"""
+    view = memoryview(buffer)
+    size = 0
+    while chunk := audio.file.read(UPLOAD_CHUNK_SIZE):
+        if size + len(chunk) > len(buffer):
+            # Too big for the pool: move what's staged into a one-off buffer and read the rest there
+            oversized = bytearray(view[:size])
+            oversized += chunk
+            oversized += audio.file.read()
+            return memoryview(oversized)
+        view[size:size + len(chunk)] = chunk
+        size += len(chunk)
+    return view[:size]
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -47,10 +260,28 @@ async def health_check():
         "model_size": MODEL_SIZE
     }
 
+async def inference_slot():
+    """Admit a request to the threadpool, answering 503 if no slot frees up within QUEUE_TIMEOUT"""
+    # Waiting here on the event loop, rather than inside the sync endpoint, keeps queued
+    # requests from holding threadpool tokens and lets the timeout actually fire
+    try:
+        await asyncio.wait_for(infer_semaphore.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Whisper is overloaded, retry later",
+            headers={"Retry-After": RETRY_AFTER}
+        )
+    try:
+        yield
+    finally:
+        infer_semaphore.release()
+
 @app.post("/transcribe")
-async def transcribe_audio(
+def transcribe_audio(
     audio: UploadFile = File(...),
-    language: str = Form(default="auto")
+    language: str = Form(default="auto"),
+    _slot: None = Depends(inference_slot)
 ):
     """Transcribe uploaded audio file"""
     
@@ -61,49 +292,58 @@ async def transcribe_audio(
     if not audio.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as temp_file:
+    try:
+        # Stage the upload in a pooled buffer, returned as soon as it is decoded to trimmed PCM
+        buffer = acquire_buffer()
         try:
-            # Save uploaded file
-            shutil.copyfileobj(audio.file, temp_file)
-            temp_path = temp_file.name
-            
-            logger.info(f"Transcribing file: {audio.filename}")
-            
-            # Prepare transcription options
-            options = {}
-            if language and language != "auto":
-                # Convert language codes
-                lang_map = {
-                    "en-IN": "en",
-                    "hi-IN": "hi", 
-                    "gu-IN": "gu"
-                }
-                options["language"] = lang_map.get(language, language)
-            
-            # Transcribe with Whisper
-            result = whisper_model.transcribe(temp_path, **options)
-            
-            # Return results
-            response = {
-                "text": result["text"].strip(),
-                "language_detected": result.get("language", "unknown"),
-                "confidence": "N/A",  # Whisper doesn't provide confidence scores
+            audio_array = prepare_audio(read_upload(audio, buffer))
+        finally:
+            buffer_pool.put_nowait(buffer)
+        
+        logger.info(f"Transcribing file: {audio.filename}")
+        
+        # Prepare transcription options
+        options = {}
+        if language and language != "auto":
+            # Convert language codes
+            options["language"] = LANG_MAP.get(language, language)
+        
+        if audio_array is None:
+            # Nothing but silence; skip the model entirely
+            return {
+                "text": "",
+                "language_detected": options.get("language", "unknown"),
+                "confidence": "N/A",
                 "engine": "whisper",
-                "model_size": MODEL_SIZE
+                "model_size": MODEL_SIZE,
+                "status": "silence"
             }
-            
-            logger.info(f"Transcription completed: {len(result['text'])} characters")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Transcription error: {e}")
-            raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
         
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # Transcribe with Whisper, reusing the result for repeated audio
+        key = cache_key(audio_array, options.get("language"))
+        result = cache_get(key)
+        if result is None:
+            result = run_whisper(audio_array, options)
+            cache_put(key, result)
+        
+        # Return results
+        response = {
+            "text": result["text"].strip(),
+            "language_detected": result.get("language", "unknown"),
+            "confidence": "N/A",  # Whisper doesn't provide confidence scores
+            "engine": "whisper",
+            "model_size": MODEL_SIZE
+        }
+        
+        logger.info(f"Transcription completed: {len(result['text'])} characters")
+        return response
+        
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
 @app.get("/")
 async def root():
@@ -120,4 +360,13 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8082)
+    workers = worker_count(resolve_device())
+    os.environ["WORKERS"] = str(workers)  # Workers inherit it, so each knows how many siblings share the cores
+    # Import string form is required for uvicorn to spawn multiple workers
+    uvicorn.run(
+        "server_original:app",
+        host="0.0.0.0",
+        port=8082,
+        workers=workers,
+        limit_concurrency=LIMIT_CONCURRENCY
+    )
@@ -6,7 +6,7 @@ source venv/bin/activate
 python -c "
 try:
     import fastapi
-    import whisper
+    import faster_whisper
     print('✅ All imports successful')
 except ImportError as e:
     print(f'❌ Import error: {e}')